@@ -2,29 +2,70 @@
 """
 Simple icon generator for PWA without external dependencies.
 Creates basic PNG files with a colored background and emoji.
+
+NumPy is used for the gradient when available (vectorized, much faster
+for the 512x512 icon) and Pillow for the PNG encode when available
+(C-level writer, smaller files), with pure-Python fallbacks so the
+script still works without any dependencies installed.
 """
 
+import functools
 import struct
 import zlib
 import base64
 
-def create_png(width, height, color_rgb):
-    """Create a simple PNG file with a solid color background."""
-    # PNG signature
-    png_signature = b'\x89PNG\r\n\x1a\n'
-
-    # Create IHDR chunk
-    ihdr_data = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
-    ihdr_chunk = create_chunk(b'IHDR', ihdr_data)
-
-    # Create image data (simple gradient effect)
-    image_data = bytearray()
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+try:
+    # libdeflate's CRC-32 (the `deflate` package on PyPI) uses
+    # carryless-multiply instructions (PCLMULQDQ on x86-64) and is an
+    # order of magnitude faster than zlib's byte-at-a-time table loop;
+    # same polynomial, same result.
+    from deflate import crc32 as _crc32
+except ImportError:
+    _crc32 = zlib.crc32
+
+@functools.lru_cache(maxsize=8)
+def build_gradient_pixels(width, height, color_rgb):
+    """
+    Build the raw RGB pixel data for the gradient.
+
+    Returns a bytes object of height * width * 3 bytes (no PNG filter
+    bytes), usable both by Pillow and by the hand-rolled encoder. The
+    script only ever asks for a couple of (size, color) combinations,
+    so repeat calls are memoized and effectively free.
+    """
     r, g, b = color_rgb
 
+    if NUMPY_AVAILABLE:
+        # Vectorized gradient: one broadcast multiply per axis instead of
+        # a Python loop per pixel.
+        ys = np.arange(height, dtype=np.float32)[:, None]
+        xs = np.arange(width, dtype=np.float32)[None, :]
+        scale = (1 - ys / height * 0.3) * (1 - xs / width * 0.2)
+
+        channels = [
+            np.clip(c * scale, 0, 255).astype(np.uint8)
+            for c in (r, g, b)
+        ]
+        return np.stack(channels, axis=-1).tobytes()
+
+    # Pure-Python fallback (same gradient, just slower). The buffer is
+    # preallocated at its final size so the interpreter never has to
+    # grow-and-copy it as pixels are written.
+    image_data = bytearray(height * width * 3)
+    pos = 0
     for y in range(height):
-        # Filter type (0 = None)
-        image_data.append(0)
-
         # Gradient effect
         factor = y / height
         r2 = int(r * (1 - factor * 0.3))
@@ -34,14 +75,39 @@ def create_png(width, height, color_rgb):
         for x in range(width):
             # Add some variation
             x_factor = x / width
-            image_data.extend([
-                max(0, min(255, int(r2 - (r2 * x_factor * 0.2)))),
-                max(0, min(255, int(g2 - (g2 * x_factor * 0.2)))),
-                max(0, min(255, int(b2 - (b2 * x_factor * 0.2))))
-            ])
-
-    # Compress image data
-    compressed_data = zlib.compress(bytes(image_data), 9)
+            image_data[pos] = max(0, min(255, int(r2 - (r2 * x_factor * 0.2))))
+            image_data[pos + 1] = max(0, min(255, int(g2 - (g2 * x_factor * 0.2))))
+            image_data[pos + 2] = max(0, min(255, int(b2 - (b2 * x_factor * 0.2))))
+            pos += 3
+
+    return bytes(image_data)
+
+def create_png(width, height, color_rgb):
+    """Create a simple PNG file with a solid color background."""
+    # PNG signature
+    png_signature = b'\x89PNG\r\n\x1a\n'
+
+    # Create IHDR chunk
+    ihdr_data = struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)
+    ihdr_chunk = create_chunk(b'IHDR', ihdr_data)
+
+    # Create image data (simple gradient effect) and compress it one
+    # scanline at a time, so peak memory stays at one row plus the
+    # deflate window instead of a second full copy of the image.
+    # Level 6 compresses the smooth gradient nearly as well as level 9
+    # at a fraction of the CPU cost; the icons are written once and
+    # served statically, so the tiny size delta is moot.
+    pixels = build_gradient_pixels(width, height, color_rgb)
+    stride = width * 3
+    filter_byte = bytes(1)  # filter type 0 = None
+
+    compressor = zlib.compressobj(6)
+    compressed = bytearray()
+    for y in range(height):
+        compressed += compressor.compress(filter_byte)
+        compressed += compressor.compress(pixels[y * stride:(y + 1) * stride])
+    compressed += compressor.flush()
+    compressed_data = bytes(compressed)
     idat_chunk = create_chunk(b'IDAT', compressed_data)
 
     # IEND chunk
@@ -56,27 +122,30 @@ def create_chunk(chunk_type, data):
     """Create a PNG chunk with length, type, data, and CRC."""
     length = struct.pack('>I', len(data))
     chunk_data = chunk_type + data
-    crc = struct.pack('>I', zlib.crc32(chunk_data) & 0xffffffff)
+    crc = struct.pack('>I', _crc32(chunk_data) & 0xffffffff)
     return length + chunk_data + crc
 
+def write_icon(size, filename, color_rgb):
+    """Write one icon, using Pillow's C-level PNG writer when available."""
+    if PIL_AVAILABLE:
+        pixels = build_gradient_pixels(size, size, color_rgb)
+        img = Image.frombytes('RGB', (size, size), pixels)
+        # Level 6, matching the fallback encoder below: near-level-9
+        # output on the smooth gradient at a fraction of the CPU cost.
+        img.save(filename, 'PNG', compress_level=6)
+    else:
+        with open(filename, 'wb') as f:
+            f.write(create_png(size, size, color_rgb))
+
 def main():
     # Create icon with gradient purple/blue color
     # Using the theme colors from the app (toddler-friendly!)
     color = (102, 126, 234)  # #667eea
 
-    # Create 192x192 icon
-    print("Creating icon-192.png...")
-    png_data_192 = create_png(192, 192, color)
-    with open('icon-192.png', 'wb') as f:
-        f.write(png_data_192)
-    print("✓ Created icon-192.png")
-
-    # Create 512x512 icon
-    print("Creating icon-512.png...")
-    png_data_512 = create_png(512, 512, color)
-    with open('icon-512.png', 'wb') as f:
-        f.write(png_data_512)
-    print("✓ Created icon-512.png")
+    for size, filename in [(192, 'icon-192.png'), (512, 'icon-512.png')]:
+        print(f"Creating {filename}...")
+        write_icon(size, filename, color)
+        print(f"✓ Created {filename}")
 
     print("\nIcons created successfully!")
     print("Note: These are simple placeholder icons. For better icons:")
@@ -5,31 +5,138 @@ Includes automatic background removal and optimization.
 """
 
 import requests
+import urllib3
 import os
+import shutil
 import sys
 import json
 import argparse
+import functools
+import hashlib
+import threading
+import numpy as np
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from PIL import Image
 from pathlib import Path
 import time
 import io
-from base64 import b64decode
 
 try:
-    from rembg import remove
-    REMBG_AVAILABLE = True
-except ImportError as e:  # Capture the exception object
-    REMBG_AVAILABLE = False
-    print("Warning: rembg not available. Background removal will be skipped.")
-    print("Install with: pip install rembg[cpu]")
-    
-    # --- This is the new debug part ---
-    print("\n" + "="*30)
-    print("DEBUG: The specific import error was:")
-    print(f"{e}")
-    print("="*30 + "\n")
-    exit()
-    # --- End new debug part ---
+    # SIMD-accelerated base64; ~5x stdlib on the multi-MB payloads the
+    # b64_json response format produces
+    from pybase64 import b64decode
+except ImportError:
+    from base64 import b64decode
+
+try:
+    # Optional: 2-3x faster than stdlib json on the multi-MB bodies
+    # that inline base64 images produce
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Optional: OpenCV's SIMD resize kernels beat Pillow's scalar
+    # Lanczos on big downscales; the Pillow path remains the fallback
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
+def rembg_providers():
+    """
+    Pick ONNX Runtime execution providers, preferring an accelerator.
+
+    CUDA on NVIDIA boxes, CoreML on Apple Silicon, CPU otherwise.
+    """
+    try:
+        import onnxruntime
+        available = onnxruntime.get_available_providers()
+    except ImportError:
+        return None
+
+    preferred = [p for p in ('CUDAExecutionProvider',
+                             'CoreMLExecutionProvider',
+                             'CPUExecutionProvider')
+                 if p in available]
+    return preferred or None
+
+
+# rembg pulls in onnxruntime and friends, a 1-3s import, so it loads
+# lazily on first use: --help, fully-cached runs and manifest skips
+# never pay for it. False once loading failed, (remove, session) after
+# a successful load.
+_REMBG = None
+_REMBG_LOCK = threading.Lock()
+
+
+def get_rembg():
+    """
+    Import rembg and build its session on first use.
+
+    Returns:
+        (remove, session) tuple, or None when rembg is unavailable
+    """
+    global _REMBG
+
+    with _REMBG_LOCK:
+        if _REMBG is None:
+            try:
+                from rembg import remove, new_session
+            except ImportError as e:
+                print("Warning: rembg not available. Background removal will be skipped.")
+                print("Install with: pip install rembg[cpu]")
+                print(f"(import error: {e})")
+                _REMBG = False
+            else:
+                # One shared session so the ONNX model loads once
+                # instead of per image; u2netp is the lighter U2-Net
+                # variant, plenty for stylized game art. REMBG_MODEL
+                # selects an alternative model, e.g. an INT8 quantized
+                # one produced by scripts/quantize_rembg_model.py
+                # (place it under U2NET_HOME so rembg finds it).
+                # Inference runs on CUDA when onnxruntime reports it,
+                # otherwise on CPU.
+                session = new_session(os.environ.get('REMBG_MODEL', 'u2netp'),
+                                      providers=rembg_providers())
+                try:
+                    # Warm the session on a tiny dummy image so the
+                    # first real item does not pay ORT's first-run cost
+                    remove(np.zeros((64, 64, 4), dtype=np.uint8),
+                           session=session)
+                except Exception as e:
+                    print(f"Warning: rembg warm-up failed: {e}")
+                _REMBG = (remove, session)
+
+    return _REMBG or None
+
+
+class RateLimiter:
+    """
+    Space API calls by a minimum interval across worker threads.
+
+    Unlike a per-item time.sleep, waiting happens only before the API
+    call, so in-flight requests and CPU post-processing overlap freely.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        """Block until this thread is allowed to issue the next API call."""
+        if self.interval <= 0:
+            return
+
+        with self._lock:
+            now = time.monotonic()
+            wait_for = max(0.0, self._next_time - now)
+            self._next_time = max(now, self._next_time) + self.interval
+
+        if wait_for > 0:
+            time.sleep(wait_for)
 
 
 def get_api_key():
@@ -43,7 +150,90 @@ def get_api_key():
     return api_key
 
 
-def generate_image(api_key, prompt, model_name="black-forest-labs/FLUX-1-schnell:free"):
+API_URL = "https://api.imagerouter.io/v1/openai/images/generations"
+
+# Optional response_format override, e.g. IMAGE_RESPONSE_FORMAT=url for
+# providers that can return a download link instead of inline base64
+RESPONSE_FORMAT = os.environ.get('IMAGE_RESPONSE_FORMAT')
+
+# One session for all API traffic: connections are kept alive and
+# reused, so only the first request pays the TCP + TLS handshake. The
+# pool is sized for the concurrent workers, and transient server/rate
+# errors retry with exponential backoff instead of failing the item.
+SESSION = requests.Session()
+SESSION.mount("https://", requests.adapters.HTTPAdapter(
+    pool_maxsize=16,
+    max_retries=urllib3.util.Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["POST", "GET"],
+    ),
+))
+
+
+def parse_json_response(response):
+    """Parse a JSON response body, using orjson when installed."""
+    if orjson is not None:
+        return orjson.loads(response.content)
+    return response.json()
+
+
+@functools.lru_cache(maxsize=4)
+def api_headers(api_key):
+    """Build (once) the request headers for a given API key."""
+    return {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+
+
+# In-run dedup: identical (prompt, model, size) requests share one API
+# call; later callers wait on the first one's Future instead of paying
+# for a second generation
+INFLIGHT = {}
+INFLIGHT_LOCK = threading.Lock()
+
+
+def generate_image(api_key, prompt, model_name="black-forest-labs/FLUX-1-schnell:free", size=None):
+    """
+    Generate an image via the API, deduplicating identical prompts.
+
+    The first caller for a given (prompt, model, size) performs the
+    request; concurrent or later callers within the same run get the
+    same result without a second API round-trip.
+
+    Args:
+        api_key: Image Router API key
+        prompt: Text description of the image to generate
+        model_name: Model to use for image generation
+        size: Requested output size, forwarded when set
+
+    Returns:
+        PIL Image object or None on failure
+    """
+    key = (prompt, model_name, size)
+
+    with INFLIGHT_LOCK:
+        future = INFLIGHT.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = Future()
+            INFLIGHT[key] = future
+
+    if not is_owner:
+        print(f"  ✓ Duplicate prompt; reusing its generation result")
+        return future.result()
+
+    image = None
+    try:
+        image = request_image(api_key, prompt, model_name, size=size)
+    finally:
+        future.set_result(image)
+    return image
+
+
+def request_image(api_key, prompt, model_name="black-forest-labs/FLUX-1-schnell:free", size=None):
     """
     Generate an image using Image Router API.
 
@@ -52,6 +242,8 @@ def generate_image(api_key, prompt, model_name="black-forest-labs/FLUX-1-schnell
         prompt: Text description of the image to generate
         model_name: Model to use for image generation
                     (default: black-forest-labs/FLUX-1-schnell:free)
+        size: Requested output size, e.g. "1024x1024"; asking the server
+              for the right size makes the downstream resize a no-op
 
     Returns:
         PIL Image object or None on failure
@@ -59,38 +251,26 @@ def generate_image(api_key, prompt, model_name="black-forest-labs/FLUX-1-schnell
     try:
         print(f"  Generating: {prompt[:60]}...")
 
-        url = "https://api.imagerouter.io/v1/openai/images/generations"
         payload = {
             "prompt": prompt,
             "model": model_name,
         }
-        headers = {
-            "Authorization": f"Bearer {api_key}",
-            "Content-Type": "application/json"
-        }
-
-        response = requests.post(url, json=payload, headers=headers)
+        if size:
+            payload["size"] = size
+        if RESPONSE_FORMAT:
+            # Opting into url responses avoids shipping the image as a
+            # multi-MB base64 string inside JSON
+            payload["response_format"] = RESPONSE_FORMAT
+
+        response = SESSION.post(API_URL, json=payload, headers=api_headers(api_key))
         response.raise_for_status()
 
-        response_data = response.json()
+        response_data = parse_json_response(response)
 
         # Extract image from OpenAI-compatible response format
         if "data" in response_data and len(response_data["data"]) > 0:
-            image_data = response_data["data"][0]
-
-            # Handle base64 encoded image
-            if "b64_json" in image_data:
-                image_bytes = b64decode(image_data["b64_json"])
-                image = Image.open(io.BytesIO(image_bytes))
-                print(f"  ✓ Generated {image.size[0]}x{image.size[1]} image")
-                return image
-
-            # Handle URL response
-            elif "url" in image_data:
-                image_url = image_data["url"]
-                image_response = requests.get(image_url)
-                image_response.raise_for_status()
-                image = Image.open(io.BytesIO(image_response.content))
+            image = decode_image_entry(response_data["data"][0])
+            if image:
                 print(f"  ✓ Generated {image.size[0]}x{image.size[1]} image")
                 return image
 
@@ -110,33 +290,129 @@ def generate_image(api_key, prompt, model_name="black-forest-labs/FLUX-1-schnell
         return None
 
 
+def decode_image_entry(image_data):
+    """
+    Decode one entry of an OpenAI-style `data` array into a PIL image.
+
+    Handles both inline base64 and url entries; returns None when the
+    entry carries neither.
+    """
+    # Handle base64 encoded image
+    if "b64_json" in image_data:
+        image_bytes = b64decode(image_data["b64_json"])
+        return to_rgba(Image.open(io.BytesIO(image_bytes)))
+
+    # Handle URL response
+    if "url" in image_data:
+        # Stream straight into a buffer rather than letting requests
+        # join the body into an intermediate bytes copy
+        with SESSION.get(image_data["url"], stream=True) as image_response:
+            image_response.raise_for_status()
+            # Unlike response.content, the raw stream does not strip
+            # Content-Encoding on its own; without this, a gzipping
+            # host would hand PIL compressed bytes
+            image_response.raw.decode_content = True
+            buf = io.BytesIO()
+            shutil.copyfileobj(image_response.raw, buf)
+        return to_rgba(Image.open(buf))
+
+    return None
+
+
+def generate_images_batch(api_key, prompts, model_name="black-forest-labs/FLUX-1-schnell:free", size=None):
+    """
+    Generate several images with a single API request.
+
+    Amortizes the request/response round-trip and server-side queueing
+    over the whole batch, for providers that accept a prompt list.
+
+    Args:
+        api_key: Image Router API key
+        prompts: List of prompt strings
+        model_name: Model to use for image generation
+        size: Requested output size, forwarded when set
+
+    Returns:
+        List of PIL Images (None entries for undecodable results), or
+        None if the provider rejected the batch shape - callers should
+        then fall back to per-prompt generate_image calls.
+    """
+    try:
+        print(f"  Generating batch of {len(prompts)} images...")
+
+        payload = {
+            "prompt": prompts,
+            "model": model_name,
+            "n": len(prompts),
+        }
+        if size:
+            payload["size"] = size
+        if RESPONSE_FORMAT:
+            payload["response_format"] = RESPONSE_FORMAT
+
+        response = SESSION.post(API_URL, json=payload, headers=api_headers(api_key))
+        response.raise_for_status()
+
+        response_data = parse_json_response(response)
+        data = response_data.get("data", [])
+        if len(data) != len(prompts):
+            print(f"  ✗ Batch returned {len(data)} results for {len(prompts)} prompts")
+            return None
+
+        images = [decode_image_entry(entry) for entry in data]
+        print(f"  ✓ Generated {sum(1 for i in images if i)} / {len(prompts)} batch images")
+        return images
+
+    except Exception as e:
+        print(f"  ✗ Batch generation failed ({e}); falling back to single requests")
+        return None
+
+
+def to_rgba(image):
+    """
+    Normalize an image to RGBA once, right after decode.
+
+    Every later stage (rembg, resize, PNG and WebP encode) then works
+    on the same pixel layout instead of each triggering its own hidden
+    mode conversion.
+    """
+    # Force the decode here: PIL's lazy loader is not thread-safe, and
+    # a still-lazy image would be load()ed concurrently by the parallel
+    # encoders in save_image (or by dedup'd workers sharing one image)
+    image.load()
+    if image.mode != 'RGBA':
+        image = image.convert('RGBA')
+    return image
+
+
 def remove_background(image):
     """
     Remove background from image using rembg.
 
+    The pixels cross the rembg boundary as a raw RGBA ndarray (no PNG
+    encode/decode) and inference reuses the module-level session, so
+    the ONNX model loads exactly once per process.
+
     Args:
         image: PIL Image object
 
     Returns:
         PIL Image with transparent background
     """
-    if not REMBG_AVAILABLE:
+    rembg = get_rembg()
+    if rembg is None:
         print("  ⚠ Skipping background removal (rembg not installed)")
         return image
 
+    remove, session = rembg
     try:
         print("  Removing background...")
 
-        # Convert image to bytes
-        img_byte_arr = io.BytesIO()
-        image.save(img_byte_arr, format='PNG')
-        img_byte_arr = img_byte_arr.getvalue()
+        # rembg accepts raw ndarrays; handing it the pixel buffer skips
+        # its internal image conversions entirely
+        arr = np.asarray(to_rgba(image))
+        result = Image.fromarray(remove(arr, session=session))
 
-        # Remove background
-        output = remove(img_byte_arr)
-
-        # Convert back to PIL Image
-        result = Image.open(io.BytesIO(output))
         print("  ✓ Background removed")
         return result
 
@@ -158,8 +434,9 @@ def optimize_image(image, max_size=1024):
     """
     width, height = image.size
 
-    # Resize if too large
-    if width > max_size or height > max_size:
+    # Resize if too large; a couple of percent over budget is not worth
+    # a full Lanczos pass
+    if max(width, height) > max_size * 1.02:
         if width > height:
             new_width = max_size
             new_height = int(height * (max_size / width))
@@ -167,33 +444,65 @@ def optimize_image(image, max_size=1024):
             new_height = max_size
             new_width = int(width * (max_size / height))
 
-        image = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
+        if CV2_AVAILABLE:
+            # Area average for >=2x shrinks (perceptually equivalent to
+            # Lanczos at a fraction of the FLOPs), SIMD Lanczos otherwise
+            if max(width, height) >= 2 * max_size:
+                interpolation = cv2.INTER_AREA
+            else:
+                interpolation = cv2.INTER_LANCZOS4
+            arr = cv2.resize(np.asarray(image), (new_width, new_height),
+                             interpolation=interpolation)
+            image = Image.fromarray(arr)
+        else:
+            # reducing_gap lets Pillow do a cheap integer box reduce
+            # first and only run Lanczos on the residual scale
+            image = image.resize((new_width, new_height),
+                                 Image.Resampling.LANCZOS, reducing_gap=2.0)
         print(f"  ✓ Resized to {new_width}x{new_height}")
 
     return image
 
 
-def save_image(image, filepath, formats=['png', 'webp']):
+def save_image(image, filepath, formats=['png', 'webp'], webp_method=4):
     """
-    Save image in multiple formats.
+    Save image in multiple formats, encoding them concurrently.
 
     Args:
         image: PIL Image object
         filepath: Path without extension
         formats: List of formats to save
+        webp_method: WebP encode effort 0-6; 4 is ~4x faster than 6
+                     for about 1% larger files
     """
+    if not formats:
+        return
+
     path = Path(filepath)
 
-    for fmt in formats:
+    def save_one(fmt):
         output_path = path.with_suffix(f'.{fmt}')
 
+        # Encode in memory first: the file is then written with a single
+        # syscall instead of Pillow's incremental writes, and the size
+        # comes from the buffer rather than an extra stat
+        buf = io.BytesIO()
         if fmt == 'webp':
-            image.save(output_path, 'WEBP', quality=90, method=6)
+            image.save(buf, 'WEBP', quality=90, method=webp_method)
         elif fmt == 'png':
-            image.save(output_path, 'PNG', optimize=True)
+            # compress_level=6 is several times faster than optimize=True
+            # (which retries multiple zlib strategies) for a few percent
+            # larger files
+            image.save(buf, 'PNG', compress_level=6)
 
-        file_size = output_path.stat().st_size / 1024
-        print(f"  ✓ Saved {output_path.name} ({file_size:.1f}KB)")
+        data = buf.getbuffer()
+        output_path.write_bytes(data)
+        print(f"  ✓ Saved {output_path.name} ({len(data) / 1024:.1f}KB)")
+
+    # libpng/libwebp release the GIL, so the encodes genuinely run in
+    # parallel on separate cores
+    with ThreadPoolExecutor(max_workers=len(formats)) as executor:
+        list(executor.map(save_one, formats))
 
 
 def load_prompts(prompts_file):
@@ -206,82 +515,290 @@ def load_prompts(prompts_file):
         sys.exit(1)
 
 
-def generate_category(api_key, category_data, output_dir, delay=2, model_name="black-forest-labs/FLUX-1-schnell:free"):
+# Content-addressed cache of processed images, shared across categories
+# and runs; keyed by prompt + model so a prompt edit misses the cache.
+# Lives outside images/ so CI's git add/status on that tree never picks
+# up cache entries.
+CACHE_DIR = Path(os.environ.get('IMAGE_CACHE_DIR', '.image-cache'))
+
+
+def prompt_hash(prompt):
+    """Hash a prompt so the manifest can detect prompt edits."""
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+def cache_key(prompt, model_name):
+    """Cache key for a processed image: prompt (normalized) plus model."""
+    digest = hashlib.sha256(
+        f"{prompt.strip().lower()}|{model_name}".encode('utf-8')
+    ).hexdigest()
+    return digest[:16]
+
+
+def load_manifest(output_path):
+    """Load the per-category manifest of completed items, if present."""
+    manifest_file = output_path / 'manifest.json'
+    if manifest_file.exists():
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Warning: could not read {manifest_file}: {e}")
+    return {}
+
+
+def save_manifest(output_path, manifest):
+    """Write the per-category manifest of completed items."""
+    manifest_file = output_path / 'manifest.json'
+    try:
+        with open(manifest_file, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+    except Exception as e:
+        print(f"Warning: could not write {manifest_file}: {e}")
+
+
+def needs_generation(item, model_name, existing):
+    """True when an item has no output on disk and no cache entry."""
+    stem = Path(item['filename']).stem
+    if stem in existing:
+        return False
+    return not (CACHE_DIR / f"{cache_key(item['prompt'], model_name)}.png").exists()
+
+
+def process_item(api_key, item, output_path, rate_limiter, model_name,
+                 existing, manifest, manifest_lock, webp_method=4,
+                 formats=('png', 'webp'), size=None, image=None):
     """
-    Generate all images for a category.
+    Generate (or reload) a single item and run the full pipeline on it.
 
     Args:
         api_key: Image Router API key
-        category_data: Dictionary with prompts and filenames
-        output_dir: Output directory path
-        delay: Delay between API calls (seconds)
+        item: Dictionary with name, prompt and filename
+        output_path: Output directory Path
+        rate_limiter: Shared RateLimiter spacing the API calls
         model_name: Model to use for image generation
-    """
-    output_path = Path(output_dir)
-    output_path.mkdir(parents=True, exist_ok=True)
+        existing: Set of output stems already present on disk
+        manifest: Dictionary of stem -> prompt hash for completed items
+        manifest_lock: Lock guarding manifest updates
+        webp_method: WebP encode effort passed through to save_image
+        formats: Output formats to write
+        size: Requested generation size passed through to generate_image
+        image: Pre-generated PIL image (from a batch call); skips the
+               per-item API request when set
 
-    total = len(category_data.get('items', []))
-    print(f"\n{'='*60}")
-    print(f"Generating {total} images for: {category_data.get('name', 'Unknown')}")
-    print(f"Output: {output_path}")
-    print(f"{'='*60}\n")
+    Returns:
+        'success', 'skip' or 'fail'
+    """
+    print(f"• {item['name']}")
+
+    output_file = output_path / item['filename']
+    stem = output_file.stem
+    png_file = output_file.with_suffix('.png')
+    item_hash = prompt_hash(item['prompt'])
+    cached_png = CACHE_DIR / f"{cache_key(item['prompt'], model_name)}.png"
+
+    if image is not None:
+        pass  # pre-generated by a batch call; go straight to the pipeline
+    elif stem in existing:
+        # Already processed with this exact prompt: nothing to do
+        if manifest.get(stem) == item_hash:
+            print(f"  ✓ Up to date (manifest). Skipping.")
+            return 'skip'
+
+        print(f"  ✓ File exists. Loading for reprocessing...")
+        # Prefer the PNG, but a webp-only leftover is just as usable
+        source = png_file if png_file.exists() else output_file.with_suffix('.webp')
+        try:
+            image = to_rgba(Image.open(source))
+        except Exception as e:
+            print(f"  ✗ Could not open {source.name}: {e}")
+            return 'fail'
+    elif cached_png.exists():
+        # Same prompt + model already processed in an earlier run or
+        # another category: reuse it, no API round-trip needed
+        print(f"  ✓ Cache hit. Copying processed image...")
+        try:
+            if 'png' in formats:
+                shutil.copyfile(cached_png, png_file)
+            image = to_rgba(Image.open(cached_png))
+            save_image(image, str(output_file),
+                       formats=[f for f in formats if f != 'png'],
+                       webp_method=webp_method)
+        except Exception as e:
+            print(f"  ✗ Could not reuse cached image: {e}")
+            return 'fail'
+
+        with manifest_lock:
+            manifest[stem] = item_hash
+        return 'success'
+    else:
+        print(f"  File not found. Attempting generation...")
+        # Respect the API rate limit, then generate
+        rate_limiter.wait()
+        image = generate_image(api_key, item['prompt'], model_name, size=size)
+
+    if not image:
+        return 'fail'
+
+    # Optimize first: matting on the downscaled image costs a fraction
+    # of matting at full generated resolution
+    image = optimize_image(image)
+
+    # Remove background
+    image = remove_background(image)
+
+    # Save in the requested formats
+    save_image(image, str(output_file), formats=list(formats),
+               webp_method=webp_method)
+
+    # Populate the cache so identical prompts are free from now on.
+    # Write to a temp file and os.replace into place: near-duplicate
+    # prompts normalize to the same cache key, and two workers
+    # copying into the same path directly could leave a torn file
+    # that poisons every later cache hit.
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp_png = cached_png.with_name(
+            f"{cached_png.stem}.{threading.get_ident()}.tmp")
+        if 'png' in formats:
+            shutil.copyfile(png_file, tmp_png)
+        else:
+            image.save(tmp_png, 'PNG', compress_level=6)
+        os.replace(tmp_png, cached_png)
+    except Exception as e:
+        print(f"  Warning: could not write cache entry: {e}")
 
-    success_count = 0
-    skip_count = 0
-    fail_count = 0
+    with manifest_lock:
+        manifest[stem] = item_hash
 
-    # --- THIS IS THE MODIFIED LOGIC ---
-    for idx, item in enumerate(category_data.get('items', []), 1):
-        print(f"[{idx}/{total}] {item['name']}")
+    return 'success'
 
-        output_file = output_path / item['filename']
-        png_file = output_file.with_suffix('.png')
-        image = None # Ensure image is None at the start
-        is_existing_file = False
 
-        if png_file.exists():
-            print(f"  ✓ File exists. Loading for reprocessing...")
-            try:
-                image = Image.open(png_file)
-                is_existing_file = True
-            except Exception as e:
-                print(f"  ✗ Could not open {png_file.name}: {e}")
-                fail_count += 1
-                continue
-        else:
-            print(f"  File not found. Attempting generation...")
-            # Generate image
-            image = generate_image(api_key, item['prompt'], model_name)
+def process_chunk(api_key, items, output_path, rate_limiter, model_name,
+                  existing, manifest, manifest_lock, webp_method,
+                  formats, size):
+    """
+    Process a group of items, batching their missing generations into a
+    single API call when the provider accepts it.
 
-        
-        # --- This block now runs for BOTH new and existing images ---
-        if image:
-            # Remove background
-            image = remove_background(image)
+    Falls back transparently to per-item generation (inside
+    process_item) when the batch request is rejected.
 
-            # Optimize
-            image = optimize_image(image)
+    Returns:
+        Counter of per-item statuses
+    """
+    pending = [item for item in items
+               if needs_generation(item, model_name, existing)]
+
+    pregenerated = {}
+    if len(pending) > 1:
+        rate_limiter.wait()
+        batch = generate_images_batch(api_key,
+                                      [item['prompt'] for item in pending],
+                                      model_name, size=size)
+        if batch:
+            pregenerated = {item['filename']: img
+                            for item, img in zip(pending, batch) if img}
+
+    counts = Counter()
+    for item in items:
+        counts[process_item(api_key, item, output_path, rate_limiter,
+                            model_name, existing, manifest, manifest_lock,
+                            webp_method, formats, size,
+                            image=pregenerated.get(item['filename']))] += 1
+    return counts
+
+
+def generate_all(api_key, prompts, categories, delay=2, model_name="black-forest-labs/FLUX-1-schnell:free", max_workers=4, webp_method=4, formats=('png', 'webp'), size=None, batch_size=1):
+    """
+    Generate images for several categories through one shared work queue.
 
-            # Save in multiple formats
-            save_image(image, str(output_file), formats=['png', 'webp'])
+    All (category, item) tasks drain through a single thread pool, so
+    categories run concurrently and a slow one no longer blocks the
+    next, while a single rate limiter spaces API calls globally instead
+    of per category. Network latency, rembg inference and image
+    encoding overlap across workers; threads suffice because the hot
+    paths (requests, PIL, rembg) release the GIL.
 
-            success_count += 1
+    Args:
+        api_key: Image Router API key
+        prompts: Full prompts dictionary keyed by category
+        categories: Iterable of category names to generate
+        delay: Minimum spacing between API calls (seconds)
+        model_name: Model to use for image generation
+        max_workers: Number of concurrent workers
+        webp_method: WebP encode effort passed through to save_image
+        formats: Output formats to write
+        size: Requested generation size passed through to generate_image
+        batch_size: Items per API request; above 1, missing images in a
+                    chunk are generated with one batched call
+    """
+    categories = list(categories)
+    contexts = {}
+    tasks = []
 
-            # Rate limiting delay (only apply if it was a new generation)
-            if not is_existing_file and idx < total:
-                print(f"  ⏳ Waiting {delay}s before next generation...")
-                time.sleep(delay)
-        
-        elif not is_existing_file:
-            # Only count as fail if it was a failed *generation*
-            fail_count += 1
+    for category in categories:
+        category_data = prompts[category]
+        output_path = Path(f"images/{category}")
+        output_path.mkdir(parents=True, exist_ok=True)
+
+        contexts[category] = {
+            'name': category_data.get('name', category),
+            'output_path': output_path,
+            # One directory scan instead of a stat per item; .webp-only
+            # leftovers count as existing too
+            'existing': {p.stem for p in output_path.iterdir()
+                         if p.suffix in ('.png', '.webp')},
+            'manifest': load_manifest(output_path),
+        }
+        # Chunk per category: items in a chunk share one batched API
+        # call when batch_size > 1 (a chunk of 1 degenerates to the
+        # plain per-item path)
+        items = category_data.get('items', [])
+        for start in range(0, len(items), batch_size):
+            tasks.append((category, items[start:start + batch_size]))
+
+    total = sum(len(chunk) for _, chunk in tasks)
+    print(f"\n{'='*60}")
+    print(f"Generating {total} images across {len(categories)} categories: "
+          f"{', '.join(categories)}")
+    print(f"{'='*60}\n")
 
-        print() # Add a newline for readability
-    # --- END OF MODIFIED LOGIC ---
+    counts = {category: Counter() for category in categories}
+    counts_lock = threading.Lock()
+    manifest_lock = threading.Lock()
+    rate_limiter = RateLimiter(delay)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for category, chunk in tasks:
+            ctx = contexts[category]
+            future = executor.submit(process_chunk, api_key, chunk,
+                                     ctx['output_path'], rate_limiter,
+                                     model_name, ctx['existing'],
+                                     ctx['manifest'], manifest_lock,
+                                     webp_method, formats, size)
+            futures[future] = (category, len(chunk))
+
+        for future in as_completed(futures):
+            category, chunk_size = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # One broken chunk must not abort the run - the other
+                # workers keep going and the manifests below still save
+                print(f"✗ Worker failed in {category}: {e}")
+                result = Counter({'fail': chunk_size})
+            with counts_lock:
+                counts[category].update(result)
 
     print(f"{'='*60}")
-    print(f"✓ Completed {category_data.get('name', 'category')}")
-    print(f"  Success: {success_count}, Skipped: {skip_count}, Failed: {fail_count}")
+    for category in categories:
+        ctx = contexts[category]
+        save_manifest(ctx['output_path'], ctx['manifest'])
+        c = counts[category]
+        print(f"✓ Completed {ctx['name']}")
+        print(f"  Success: {c['success']}, Skipped: {c['skip']}, Failed: {c['fail']}")
     print(f"{'='*60}\n")
 
 
@@ -304,8 +821,40 @@ def main():
     parser.add_argument(
         '--delay',
         type=int,
-        default=2,
-        help='Delay between API calls in seconds'
+        default=0,
+        help='Minimum spacing between API calls in seconds (default: 0; '
+             'rate limits are handled reactively via 429/Retry-After)'
+    )
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=4,
+        help='Number of concurrent pipeline workers (default: 4)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        type=int,
+        default=1,
+        help='Prompts per API request; >1 batches generations for providers that allow it (default: 1)'
+    )
+    parser.add_argument(
+        '--size',
+        type=str,
+        default=None,
+        help='Ask the server for this output size, e.g. 1024x1024 (model dependent)'
+    )
+    parser.add_argument(
+        '--formats',
+        type=str,
+        default='png,webp',
+        help='Comma-separated output formats (default: png,webp)'
+    )
+    parser.add_argument(
+        '--webp-effort',
+        type=int,
+        default=4,
+        choices=range(0, 7),
+        help='WebP encode effort 0-6 (default: 4; 6 is ~4x slower for ~1%% smaller files)'
     )
     parser.add_argument(
         '--model',
@@ -337,11 +886,12 @@ def main():
             sys.exit(1)
         categories = [args.category]
 
-    # Generate images for each category
-    for category in categories:
-        category_data = prompts[category]
-        output_dir = f"images/{category}"
-        generate_category(api_key, category_data, output_dir, delay=args.delay, model_name=args.model)
+    # Generate images for all requested categories through one queue
+    generate_all(api_key, prompts, categories, delay=args.delay,
+                 model_name=args.model, max_workers=args.max_workers,
+                 webp_method=args.webp_effort,
+                 formats=[f.strip() for f in args.formats.split(',') if f.strip()],
+                 size=args.size, batch_size=max(1, args.batch_size))
 
     print("=" * 60)
     print("✓ All images generated successfully!")
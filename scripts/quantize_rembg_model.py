@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Quantize a rembg ONNX model to INT8 for faster background removal.
+
+Dynamic INT8 quantization shrinks the model weights ~4x and lets ONNX
+Runtime use its INT8 (VNNI on modern x86) kernels, typically 2-4x
+faster inference with no visible quality loss on stylized game art.
+
+Usage:
+    python scripts/quantize_rembg_model.py ~/.u2net/u2netp.onnx ~/.u2net/u2netp_int8.onnx
+
+Then point generate_images.py at the quantized model:
+    export REMBG_MODEL=u2netp_int8
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Quantize a rembg ONNX model to INT8'
+    )
+    parser.add_argument('model_in', type=Path, help='Path to the FP32 ONNX model')
+    parser.add_argument('model_out', type=Path, help='Path for the quantized model')
+    args = parser.parse_args()
+
+    try:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+    except ImportError:
+        print("Error: onnxruntime is required (pip install onnxruntime)")
+        sys.exit(1)
+
+    if not args.model_in.exists():
+        print(f"Error: {args.model_in} not found")
+        print("Run generate_images.py once so rembg downloads the model first.")
+        sys.exit(1)
+
+    print(f"Quantizing {args.model_in} -> {args.model_out}...")
+    quantize_dynamic(str(args.model_in), str(args.model_out),
+                     weight_type=QuantType.QInt8)
+
+    size_in = args.model_in.stat().st_size / (1024 * 1024)
+    size_out = args.model_out.stat().st_size / (1024 * 1024)
+    print(f"✓ Done ({size_in:.1f}MB -> {size_out:.1f}MB)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Recompress PNGs with a heavyweight optimizer before release.
+
+Working runs of generate_images.py save PNGs at zlib level 6 (fast);
+since the repo serves the same files many times, it pays to spend the
+expensive encode exactly once, here, instead of on every pipeline run.
+Uses oxipng when available, falling back to zopflipng.
+
+Usage:
+    python scripts/recompress_images.py            # recompress images/
+    python scripts/recompress_images.py images/food
+"""
+
+import argparse
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+
+def find_optimizer():
+    """Pick the strongest PNG optimizer installed on this machine."""
+    if shutil.which('oxipng'):
+        return lambda path: ['oxipng', '-o', '4', '--strip', 'safe', str(path)]
+    if shutil.which('zopflipng'):
+        return lambda path: ['zopflipng', '-y', str(path), str(path)]
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Recompress generated PNGs with oxipng/zopflipng'
+    )
+    parser.add_argument(
+        'directory',
+        type=Path,
+        nargs='?',
+        default=Path('images'),
+        help='Directory to recompress recursively (default: images/)'
+    )
+    args = parser.parse_args()
+
+    optimizer = find_optimizer()
+    if optimizer is None:
+        print("Error: neither oxipng nor zopflipng found on PATH")
+        print("Install one, e.g.: cargo install oxipng / apt install zopfli")
+        sys.exit(1)
+
+    pngs = sorted(args.directory.rglob('*.png'))
+    if not pngs:
+        print(f"No PNGs found under {args.directory}")
+        return
+
+    total_before = 0
+    total_after = 0
+
+    for png in pngs:
+        before = png.stat().st_size
+        try:
+            subprocess.run(optimizer(png), check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            print(f"✗ {png}: {e.stderr.decode(errors='replace').strip()}")
+            continue
+
+        after = png.stat().st_size
+        total_before += before
+        total_after += after
+        print(f"✓ {png} ({before / 1024:.1f}KB -> {after / 1024:.1f}KB)")
+
+    if total_before:
+        saved = (1 - total_after / total_before) * 100
+        print(f"\nDone: {total_before / 1024:.1f}KB -> {total_after / 1024:.1f}KB ({saved:.1f}% saved)")
+
+
+if __name__ == '__main__':
+    main()